@@ -8,7 +8,9 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+import os
 import numpy as np
+import pyarrow as pa
 from datetime import datetime
 
 # Page configuration
@@ -18,7 +20,55 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
+def read_analysis_csv(csv_file):
+    """Read an analysis dataset CSV with explicit column dtypes"""
+    # Explicit dtypes keep flags compact and low-cardinality text
+    # columns as categoricals, which also speeds up the segment groupbys.
+    # The integer columns are nullable so blank cells load as NA.
+    # Timestamps are parsed once here so min/max and filtering stay numeric
+    return pd.read_csv(csv_file, parse_dates=[
+        'order_purchase_timestamp',
+        'order_approved_at',
+        'order_delivered_carrier_date',
+        'order_delivered_customer_date',
+        'order_estimated_delivery_date'
+    ], dtype={
+        'order_status': 'category',
+        'cart_status': 'category',
+        'is_abandoned': 'Int8',
+        'is_completed': 'Int8',
+        'customer_zip_code_prefix': 'Int32',
+        'customer_city': 'category',
+        'customer_state': 'category',
+        'payment_type': 'category',
+        'product_category_name_english': 'category'
+    })
+
+def convert_to_parquet(csv_file):
+    """Write a typed Parquet copy of an analysis CSV, reusing it while up to date"""
+    parquet_file = csv_file.with_suffix('.parquet')
+    
+    # Rebuild when the CSV changes, or when this script does, since it defines the column types
+    source_mtime = max(csv_file.stat().st_mtime, Path(__file__).stat().st_mtime)
+    if not parquet_file.exists() or parquet_file.stat().st_mtime < source_mtime:
+        # Write to a per-process temporary file first so a failed or concurrent
+        # write never leaves a truncated copy
+        tmp_file = parquet_file.with_suffix(f'.{os.getpid()}.parquet.tmp')
+        read_analysis_csv(csv_file).to_parquet(tmp_file, engine='pyarrow', compression='zstd', index=False)
+        tmp_file.replace(parquet_file)
+    
+    return parquet_file
+
+# Segment stats keep full precision; tables round only when rendered
+SEGMENT_COLUMN_CONFIG = {
+    'abandonment_rate': st.column_config.NumberColumn(format="%.3f"),
+    'total_revenue': st.column_config.NumberColumn(format="%.3f"),
+    'avg_cart_value': st.column_config.NumberColumn(format="%.3f")
+}
+
+# The dataset is loaded lazily on first use and shared by every session as a
+# single read-only frame; st.cache_data would hand each rerun its own copy
+@st.cache_resource
 def load_analysis_data():
     """Load the latest analysis dataset"""
     try:
@@ -28,8 +78,22 @@ def load_analysis_data():
         # Find the most recent analysis dataset
         csv_files = list(reports_dir.glob("analysis_dataset_*.csv"))
         if csv_files:
-            latest_file = max(csv_files, key=lambda x: x.stat().st_ctime)
-            df = pd.read_csv(latest_file)
+            latest_csv = max(csv_files, key=lambda x: x.stat().st_ctime)
+            
+            # Parquet keeps the column types and loads much faster than re-parsing text
+            try:
+                latest_file = convert_to_parquet(latest_csv)
+                df = pd.read_parquet(latest_file, engine='pyarrow')
+            except (OSError, ValueError, pa.ArrowException):
+                # Unwritable reports folder or unreadable copy: drop any bad copy
+                # so the next load rebuilds it, and parse the CSV this time
+                try:
+                    latest_csv.with_suffix('.parquet').unlink(missing_ok=True)
+                except OSError:
+                    pass
+                latest_file = latest_csv
+                df = read_analysis_csv(latest_csv)
+            
             return df, str(latest_file)
         else:
             st.error("No analysis dataset found in reports folder.")
@@ -38,29 +102,29 @@ def load_analysis_data():
         st.error(f"Error loading analysis data: {e}")
         return None, None
 
-def calculate_summary_stats(df):
+# Cached helpers take the dataset as _df, which Streamlit leaves unhashed, and
+# key their results on file_path so reruns skip hashing the whole frame
+@st.cache_data
+def calculate_summary_stats(_df, file_path):
     """Calculate summary statistics"""
-    if df is None:
+    if _df is None:
         return {}
     
-    # Clean the data
-    df = df.copy()
-    df['is_abandoned'] = df['is_abandoned'].fillna(0)
-    df['is_completed'] = df['is_completed'].fillna(0)
-    df['cart_value'] = df['cart_value'].fillna(0)
+    # Reduce over plain float arrays; missing flags (NA in the nullable Int8
+    # columns) and missing cart values count as zero
+    cart_values = _df['cart_value'].to_numpy(dtype=np.float64, na_value=0.0)
+    abandoned = _df['is_abandoned'].to_numpy(dtype=np.float64, na_value=0.0)
+    completed = _df['is_completed'].to_numpy(dtype=np.float64, na_value=0.0)
     
-    total_orders = len(df)
-    abandoned_orders = int(df['is_abandoned'].sum())
-    completed_orders = int(df['is_completed'].sum())
+    total_orders = len(_df)
+    abandoned_orders = int(abandoned.sum())
+    completed_orders = int(completed.sum())
     abandonment_rate = abandoned_orders / total_orders if total_orders > 0 else 0
     
-    # Revenue calculations
-    completed_df = df[df['is_completed'] == 1]
-    abandoned_df = df[df['is_abandoned'] == 1]
-    
-    total_revenue = float(completed_df['cart_value'].sum())
-    lost_revenue = float(abandoned_df['cart_value'].sum())
-    avg_cart_value = float(df['cart_value'].mean())
+    # Revenue calculations: dot products with the 0/1 flags sum in one pass
+    total_revenue = float(cart_values @ completed)
+    lost_revenue = float(cart_values @ abandoned)
+    avg_cart_value = float(cart_values.sum()) / total_orders if total_orders > 0 else 0
     
     return {
         'total_orders': total_orders,
@@ -73,6 +137,120 @@ def calculate_summary_stats(df):
         'potential_recovery_10pct': lost_revenue * 0.10
     }
 
+@st.cache_data
+def calculate_cart_value_bins(_df, file_path, bins=30):
+    """Bin cart values into equal-width histogram bars"""
+    cart_values = _df['cart_value'].dropna().to_numpy()
+    orders, edges = np.histogram(cart_values, bins=bins)
+    
+    return pd.DataFrame({
+        'bin_center': (edges[:-1] + edges[1:]) / 2,
+        'bin_width': np.diff(edges),
+        'orders': orders
+    })
+
+def aggregate_by_segment(df, column):
+    """Aggregate order counts, abandonment and revenue per value of a column"""
+    grouped = df.groupby(column, observed=True)
+    total_orders = grouped.size()
+    abandoned_orders = grouped['is_abandoned'].sum()
+    total_revenue = grouped['cart_value'].sum()
+    
+    # Rates and averages derive from the sums; missing cart values are skipped
+    stats = pd.DataFrame({
+        'total_orders': total_orders,
+        'abandoned_orders': abandoned_orders,
+        'abandonment_rate': abandoned_orders / total_orders,
+        'total_revenue': total_revenue,
+        'avg_cart_value': total_revenue / grouped['cart_value'].count()
+    })
+    
+    return stats
+
+@st.cache_data
+def calculate_category_stats(_df, file_path):
+    """Calculate category breakdown ranked by abandonment rate"""
+    category_stats = aggregate_by_segment(_df, 'product_category_name_english')
+    category_stats = category_stats[category_stats['total_orders'] >= 50]
+    return category_stats.sort_values('abandonment_rate', ascending=False)
+
+@st.cache_data
+def calculate_payment_stats(_df, file_path):
+    """Calculate payment method breakdown"""
+    return aggregate_by_segment(_df, 'payment_type')
+
+@st.cache_data
+def calculate_state_stats(_df, file_path):
+    """Calculate state breakdown ranked by abandonment rate"""
+    state_stats = aggregate_by_segment(_df, 'customer_state')
+    state_stats = state_stats[state_stats['total_orders'] >= 100]
+    return state_stats.sort_values('abandonment_rate', ascending=False)
+
+@st.cache_data
+def calculate_missing_values(_df, file_path):
+    """Count missing values for the columns that have any"""
+    missing_data = _df.isnull().sum()
+    missing_pct = (missing_data / len(_df)) * 100
+    quality_df = pd.DataFrame({
+        'Missing Values': missing_data,
+        'Missing %': missing_pct.round(2)
+    })
+    return quality_df[quality_df['Missing Values'] > 0]
+
+# Figures depend only on the dataset, so they are built once and shared across
+# reruns with st.cache_resource; callers only render them and never modify them
+@st.cache_resource
+def build_completion_pie_chart(completed_orders, abandoned_orders):
+    """Build the completed vs abandoned orders pie chart"""
+    fig = go.Figure(data=[go.Pie(
+        labels=['Completed Orders', 'Abandoned Orders'],
+        values=[completed_orders, abandoned_orders],
+        marker=dict(colors=['#2ecc71', '#e74c3c'])
+    )])
+    fig.update_layout(title="Order Completion vs Abandonment")
+    return fig
+
+@st.cache_resource
+def build_cart_value_histogram(cart_value_bins):
+    """Build the cart value distribution chart from pre-binned counts"""
+    fig = px.bar(
+        cart_value_bins,
+        x='bin_center',
+        y='orders',
+        title="Cart Value Distribution",
+        labels={'bin_center': 'Cart Value ($)', 'orders': 'Number of Orders'}
+    )
+    fig.update_traces(width=cart_value_bins['bin_width'])
+    fig.update_layout(bargap=0)
+    return fig
+
+@st.cache_resource
+def build_abandonment_rate_chart(stats, title, x_label, tickangle=None):
+    """Build a bar chart of abandonment rate per segment"""
+    fig = px.bar(
+        x=stats.index,
+        y=stats['abandonment_rate'],
+        title=title,
+        labels={'x': x_label, 'y': 'Abandonment Rate'}
+    )
+    if tickangle is not None:
+        fig.update_xaxes(tickangle=tickangle)
+    return fig
+
+@st.cache_resource
+def build_sample_table(_df, file_path, rows=100):
+    """Convert the first rows of the dataset to an Arrow table for display"""
+    # st.dataframe renders Arrow tables directly, so the sample is converted once
+    # instead of on every rerun; converting the whole frame would double its memory
+    return pa.Table.from_pandas(_df.head(rows), preserve_index=False)
+
+@st.cache_resource
+def load_dataset_csv_bytes(file_path):
+    """Read the source CSV of the loaded dataset for download"""
+    # The dataset is always loaded from this CSV or a Parquet copy of it, so its
+    # bytes can be served as-is instead of re-serializing the frame
+    return Path(file_path).with_suffix('.csv').read_bytes()
+
 def main():
     # Header
     st.title("E-Commerce Cart Abandonment Analysis")
@@ -93,24 +271,24 @@ def main():
         ["Executive Summary", "Category Analysis", "Payment Analysis", "Geographic Analysis", "Detailed Data"]
     )
     
-    # Calculate summary stats
-    summary = calculate_summary_stats(df)
-    
     if analysis_type == "Executive Summary":
-        show_executive_summary(summary, df)
+        show_executive_summary(df, file_path)
     elif analysis_type == "Category Analysis":
-        show_category_analysis(df)
+        show_category_analysis(df, file_path)
     elif analysis_type == "Payment Analysis":
-        show_payment_analysis(df)
+        show_payment_analysis(df, file_path)
     elif analysis_type == "Geographic Analysis":
-        show_geographic_analysis(df)
+        show_geographic_analysis(df, file_path)
     elif analysis_type == "Detailed Data":
-        show_detailed_data(df)
+        show_detailed_data(df, file_path)
 
-def show_executive_summary(summary, df):
+def show_executive_summary(df, file_path):
     """Display executive summary dashboard"""
     st.header("Executive Summary")
     
+    # Summary stats are only needed by this view
+    summary = calculate_summary_stats(df, file_path)
+    
     # KPI Metrics
     col1, col2, col3, col4 = st.columns(4)
     
@@ -147,108 +325,74 @@ def show_executive_summary(summary, df):
     
     with col1:
         # Pie chart for completion vs abandonment
-        fig_pie = go.Figure(data=[go.Pie(
-            labels=['Completed Orders', 'Abandoned Orders'],
-            values=[summary['completed_orders'], summary['abandoned_orders']],
-            marker=dict(colors=['#2ecc71', '#e74c3c'])
-        )])
-        fig_pie.update_layout(title="Order Completion vs Abandonment")
+        fig_pie = build_completion_pie_chart(summary['completed_orders'], summary['abandoned_orders'])
         st.plotly_chart(fig_pie, width="stretch")
     
     with col2:
-        # Cart value distribution
-        fig_hist = px.histogram(
-            df, 
-            x='cart_value', 
-            nbins=30,
-            title="Cart Value Distribution",
-            labels={'cart_value': 'Cart Value ($)', 'count': 'Number of Orders'}
-        )
+        # Cart value distribution, binned up front so the chart ships 30 bars instead of every order
+        fig_hist = build_cart_value_histogram(calculate_cart_value_bins(df, file_path))
         st.plotly_chart(fig_hist, width="stretch")
 
-def show_category_analysis(df):
+def show_category_analysis(df, file_path):
     """Display category-wise analysis"""
     st.header("Product Category Analysis")
     
-    # Category stats
-    category_stats = df.groupby('product_category_name_english').agg({
-        'is_abandoned': ['count', 'sum', 'mean'],
-        'cart_value': ['sum', 'mean']
-    }).round(3)
-    
-    category_stats.columns = ['total_orders', 'abandoned_orders', 'abandonment_rate', 'total_revenue', 'avg_cart_value']
-    category_stats = category_stats[category_stats['total_orders'] >= 50]
-    category_stats = category_stats.sort_values('abandonment_rate', ascending=False)
+    category_stats = calculate_category_stats(df, file_path)
     
     # Top categories by abandonment rate
     top_categories = category_stats.head(10)
     
-    fig_bar = px.bar(
-        x=top_categories.index,
-        y=top_categories['abandonment_rate'],
+    fig_bar = build_abandonment_rate_chart(
+        top_categories,
         title="Top 10 Categories by Abandonment Rate",
-        labels={'x': 'Product Category', 'y': 'Abandonment Rate'}
+        x_label='Product Category',
+        tickangle=45
     )
-    fig_bar.update_xaxes(tickangle=45)
     st.plotly_chart(fig_bar, width="stretch")
     
     # Category data table
     st.subheader("Category Performance Details")
-    st.dataframe(category_stats, width="stretch")
+    st.dataframe(category_stats, width="stretch", column_config=SEGMENT_COLUMN_CONFIG)
 
-def show_payment_analysis(df):
+def show_payment_analysis(df, file_path):
     """Display payment method analysis"""
     st.header("Payment Method Analysis")
     
-    payment_stats = df.groupby('payment_type').agg({
-        'is_abandoned': ['count', 'sum', 'mean'],
-        'cart_value': ['sum', 'mean']
-    }).round(3)
-    
-    payment_stats.columns = ['total_orders', 'abandoned_orders', 'abandonment_rate', 'total_revenue', 'avg_cart_value']
+    payment_stats = calculate_payment_stats(df, file_path)
     
     # Payment method chart
-    fig_payment = px.bar(
-        x=payment_stats.index,
-        y=payment_stats['abandonment_rate'],
+    fig_payment = build_abandonment_rate_chart(
+        payment_stats,
         title="Abandonment Rate by Payment Method",
-        labels={'x': 'Payment Method', 'y': 'Abandonment Rate'}
+        x_label='Payment Method'
     )
     st.plotly_chart(fig_payment, width="stretch")
     
     # Payment method data
     st.subheader("Payment Method Performance")
-    st.dataframe(payment_stats, width="stretch")
+    st.dataframe(payment_stats, width="stretch", column_config=SEGMENT_COLUMN_CONFIG)
 
-def show_geographic_analysis(df):
+def show_geographic_analysis(df, file_path):
     """Display geographic analysis"""
     st.header("Geographic Analysis")
     
-    state_stats = df.groupby('customer_state').agg({
-        'is_abandoned': ['count', 'sum', 'mean'],
-        'cart_value': ['sum', 'mean']
-    }).round(3)
-    
-    state_stats.columns = ['total_orders', 'abandoned_orders', 'abandonment_rate', 'total_revenue', 'avg_cart_value']
-    state_stats = state_stats[state_stats['total_orders'] >= 100]
-    state_stats = state_stats.sort_values('abandonment_rate', ascending=False)
+    state_stats = calculate_state_stats(df, file_path)
     
     # State analysis chart
     top_states = state_stats.head(15)
     
-    fig_states = px.bar(
-        x=top_states.index,
-        y=top_states['abandonment_rate'],
+    fig_states = build_abandonment_rate_chart(
+        top_states,
         title="Top 15 States by Abandonment Rate",
-        labels={'x': 'State', 'y': 'Abandonment Rate'}
+        x_label='State'
     )
     st.plotly_chart(fig_states, width="stretch")
     
     # State data table
     st.subheader("State Performance Details")
-    st.dataframe(state_stats, width="stretch")
+    st.dataframe(state_stats, width="stretch", column_config=SEGMENT_COLUMN_CONFIG)
 
-def show_detailed_data(df):
+def show_detailed_data(df, file_path):
     """Display detailed data exploration"""
     st.header("Detailed Data Exploration")
     
@@ -263,23 +407,16 @@ def show_detailed_data(df):
     
     with col2:
         st.subheader("Data Quality")
-        missing_data = df.isnull().sum()
-        missing_pct = (missing_data / len(df)) * 100
-        quality_df = pd.DataFrame({
-            'Missing Values': missing_data,
-            'Missing %': missing_pct.round(2)
-        })
-        st.dataframe(quality_df[quality_df['Missing Values'] > 0])
+        st.dataframe(calculate_missing_values(df, file_path))
     
     # Sample data
     st.subheader("Sample Data")
-    st.dataframe(df.head(100), width="stretch")
+    st.dataframe(build_sample_table(df, file_path), width="stretch")
     
     # Download option
-    csv = df.to_csv(index=False)
     st.download_button(
         label="Download Full Dataset",
-        data=csv,
+        data=load_dataset_csv_bytes(file_path),
         file_name="cart_abandonment_analysis.csv",
         mime="text/csv"
     )